@@ -10,6 +10,8 @@ import os
 from memory_profiler import profile
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Let the users app create its schema in the profiling database
+os.environ.setdefault('INIT_DB', '1')
 
 from users_service.app import create_app as create_users_app
 from users_service.application.services import UserService
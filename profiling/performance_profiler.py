@@ -11,6 +11,8 @@ import sys
 import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Let the users app create its schema in the profiling database
+os.environ.setdefault('INIT_DB', '1')
 
 from users_service.app import create_app as create_users_app
 from rooms_service.app import create_app as create_rooms_app
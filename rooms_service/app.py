@@ -14,10 +14,14 @@ db = SQLAlchemy()
 jwt = JWTManager()
 
 
-def create_app():
+def create_app(config=None):
     """
     Create and configure the Flask application.
 
+    Args:
+        config (dict, optional): Settings that override the environment-based
+            defaults. Applied before the extensions are initialized.
+
     Returns:
         Flask: Configured Flask application instance
     """
@@ -32,6 +36,9 @@ def create_app():
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 3600  # 1 hour
 
+    if config:
+        app.config.update(config)
+
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
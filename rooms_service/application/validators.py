@@ -9,6 +9,11 @@ import re
 import bleach
 
 
+_ROOM_NAME_RE = re.compile(r'^[a-zA-Z0-9\s\-_]{2,100}$')
+_EQUIPMENT_ITEM_RE = re.compile(r'^[a-zA-Z0-9\s\-_/()]+$')
+_LOCATION_RE = re.compile(r'^[a-zA-Z0-9\s\-,.#]+$')
+
+
 class ValidationError(Exception):
     """Custom exception for validation errors."""
     pass
@@ -62,7 +67,7 @@ def validate_room_name(name):
     name = sanitize_string(name, max_length=100)
 
     # Room name should be alphanumeric with spaces, hyphens, and underscores
-    if not re.match(r'^[a-zA-Z0-9\s\-_]{2,100}$', name):
+    if not _ROOM_NAME_RE.match(name):
         raise ValidationError(
             "Room name must be 2-100 characters and contain only letters, numbers, spaces, hyphens, and underscores"
         )
@@ -134,7 +139,7 @@ def validate_equipment(equipment):
                 raise ValidationError("Each equipment item must be at most 50 characters")
 
             # Validate characters
-            if not re.match(r'^[a-zA-Z0-9\s\-_/()]+$', sanitized_item):
+            if not _EQUIPMENT_ITEM_RE.match(sanitized_item):
                 raise ValidationError(
                     "Equipment items can only contain letters, numbers, spaces, and basic punctuation"
                 )
@@ -160,7 +165,7 @@ def validate_location(location):
     location = sanitize_string(location, max_length=200)
 
     # Location should contain alphanumeric with spaces, hyphens, commas, and periods
-    if not re.match(r'^[a-zA-Z0-9\s\-,.#]+$', location):
+    if not _LOCATION_RE.match(location):
         raise ValidationError(
             "Location must contain only letters, numbers, spaces, hyphens, commas, periods, and #"
         )
@@ -24,6 +24,10 @@ class Room(db.Model):
     """
 
     __tablename__ = 'rooms'
+    __table_args__ = (
+        # Backs the status + minimum-capacity filter used by room search
+        db.Index('ix_rooms_status_capacity', 'status', 'capacity'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False, index=True)
@@ -43,7 +47,7 @@ class Room(db.Model):
         """
         if not self.equipment:
             return []
-        return [item.strip() for item in self.equipment.split(',') if item.strip()]
+        return [item for item in map(str.strip, self.equipment.split(',')) if item]
 
     def set_equipment_list(self, equipment_list):
         """
@@ -56,7 +60,8 @@ class Room(db.Model):
             None
         """
         if equipment_list:
-            self.equipment = ', '.join(str(item).strip() for item in equipment_list if str(item).strip())
+            items = (str(item).strip() for item in equipment_list)
+            self.equipment = ', '.join(item for item in items if item)
         else:
             self.equipment = ''
 
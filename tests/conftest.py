@@ -0,0 +1,174 @@
+"""
+Shared Test Configuration
+
+This module provides database helpers shared by the service test suites.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+import bcrypt
+import pytest
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import the service modules once at collection time rather than lazily
+# during the first test
+import rooms_service.application.services  # noqa: E402,F401
+import rooms_service.application.validators  # noqa: E402,F401
+from rooms_service.app import db as rooms_db  # noqa: E402
+from rooms_service.domain.models import Room  # noqa: E402
+
+
+_SQLITE_TEST_PRAGMAS = (
+    'PRAGMA journal_mode=MEMORY',
+    'PRAGMA synchronous=OFF',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA locking_mode=EXCLUSIVE',
+)
+
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """
+    Prepare every SQLite test connection.
+
+    pysqlite is stopped from issuing its own BEGIN so SAVEPOINTs nest
+    correctly, and durability features the throwaway databases don't
+    need are switched off.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    dbapi_connection.isolation_level = None
+
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_TEST_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+@event.listens_for(Engine, 'begin')
+def _emit_sqlite_begin(conn):
+    """Emit BEGIN ourselves now that pysqlite no longer does."""
+    if conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql('BEGIN')
+
+
+_FAKE_HASH_PREFIX = b'$fake$'
+
+
+def _fake_hashpw(password, salt):
+    """Stand-in for ``bcrypt.hashpw`` that skips the key stretching."""
+    return _FAKE_HASH_PREFIX + password
+
+
+def _fake_checkpw(password, hashed_password):
+    """Stand-in for ``bcrypt.checkpw`` matching ``_fake_hashpw``."""
+    return hashed_password == _FAKE_HASH_PREFIX + password
+
+
+@pytest.fixture(scope='session', autouse=True)
+def fast_password_hashing():
+    """
+    Replace bcrypt with a trivial hasher for the whole test session.
+
+    Every registration and login would otherwise pay for a full bcrypt
+    round; the tests only care that hashing and checking agree.
+    """
+    with swap_attr(bcrypt, 'hashpw', _fake_hashpw), \
+            swap_attr(bcrypt, 'checkpw', _fake_checkpw):
+        yield
+
+
+class _ConnectionBoundSession(Session):
+    """Session that always uses the connection it was created with."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        return bind if bind is not None else self.bind
+
+
+@contextmanager
+def swap_attr(obj, name, value):
+    """
+    Temporarily replace an attribute.
+
+    A plain getattr/setattr pair is much cheaper than ``unittest.mock.patch``
+    and is all the auth stubs need.
+
+    Args:
+        obj: Object or module owning the attribute
+        name (str): Attribute name
+        value: Replacement value
+
+    Yields:
+        The replacement value
+    """
+    original = getattr(obj, name)
+    setattr(obj, name, value)
+
+    try:
+        yield value
+    finally:
+        setattr(obj, name, original)
+
+
+@contextmanager
+def rollback_session(db):
+    """
+    Run a test inside an outer transaction that is rolled back afterwards.
+
+    ``db.session`` is swapped for a scoped session bound to a single
+    connection. Commits made by the code under test only release a
+    SAVEPOINT, so the schema is built once and every test still starts
+    from an empty database. Objects are not expired on commit.
+
+    Args:
+        db (SQLAlchemy): Flask-SQLAlchemy extension of the service under test
+
+    Yields:
+        scoped_session: The session installed as ``db.session``
+    """
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    session = db._make_scoped_session({
+        'class_': _ConnectionBoundSession,
+        'bind': connection,
+        'join_transaction_mode': 'create_savepoint',
+        # Seed data is read back after commit; don't reload it with a SELECT
+        'expire_on_commit': False,
+    })
+    original_session = db.session
+    db.session = session
+
+    try:
+        yield session
+    finally:
+        session.remove()
+        db.session = original_session
+        transaction.rollback()
+        connection.close()
+
+
+def seed_rooms(rows):
+    """
+    Insert rooms with one Core INSERT instead of an ORM unit-of-work flush.
+
+    Args:
+        rows (list): Column values for each room, e.g. ``{'name': ..., 'capacity': ...,
+            'location': ...}``. ``equipment`` is the stored comma-separated string.
+
+    Returns:
+        list: IDs of the inserted rooms, in the order given
+    """
+    table = Room.__table__
+    statement = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+    room_ids = rooms_db.session.execute(statement, rows).scalars().all()
+    rooms_db.session.commit()
+    return room_ids
@@ -4,196 +4,201 @@ Unit Tests for Rooms Service
 This module contains comprehensive unit tests for the Rooms Service API endpoints.
 """
 
+import json
 import pytest
-import sys
-import os
-from unittest.mock import patch, MagicMock
-
-# Add parent directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import threading
+from flask_jwt_extended import create_access_token
 
 from rooms_service.app import create_app, db
-from rooms_service.domain.models import Room
 from rooms_service.application.services import RoomService
+from rooms_service.application import auth
 from rooms_service.application.validators import ValidationError
+from tests.conftest import rollback_session, seed_rooms, swap_attr
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def app():
-    """Create and configure a test application instance."""
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    """Create the test application and its schema once per test session."""
+    app = create_app(config={
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'TESTING': True
+    })
 
     with app.app_context():
         db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+
+    return app
+
+
+@pytest.fixture(autouse=True)
+def db_session(app):
+    """
+    Push one app context per test and roll back everything the test writes.
+
+    Tests can use ``db.session`` directly without their own app context.
+    """
+    with app.app_context(), rollback_session(db) as session:
+        yield session
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def client(app):
     """Create a test client for the application."""
     return app.test_client()
 
 
-@pytest.fixture
-def mock_auth():
-    """Mock authentication to bypass Users Service calls."""
-    with patch('rooms_service.application.auth.get_user_from_token') as mock:
-        mock.return_value = {
-            'id': 1,
-            'username': 'admin',
-            'role': 'admin',
-            'email': 'admin@example.com'
-        }
-        yield mock
-
-
-@pytest.fixture
-def mock_facility_manager_auth():
-    """Mock authentication for facility manager."""
-    with patch('rooms_service.application.auth.get_user_from_token') as mock:
-        mock.return_value = {
-            'id': 2,
-            'username': 'facility_manager',
-            'role': 'facility_manager',
-            'email': 'fm@example.com'
-        }
-        yield mock
-
-
-@pytest.fixture
-def mock_regular_user_auth():
-    """Mock authentication for regular user."""
-    with patch('rooms_service.application.auth.get_user_from_token') as mock:
-        mock.return_value = {
-            'id': 3,
-            'username': 'user',
-            'role': 'regular_user',
-            'email': 'user@example.com'
-        }
-        yield mock
-
-
-@pytest.fixture
-def auth_headers():
-    """Mock auth headers."""
-    return {'Authorization': 'Bearer fake-token'}
+# Request body shared by several update tests, encoded once at import time
+CAPACITY_UPDATE = json.dumps({'capacity': 12})
 
+TEST_USERS = {
+    'admin': {
+        'id': 1,
+        'username': 'admin',
+        'role': 'admin',
+        'email': 'admin@example.com'
+    },
+    'facility_manager': {
+        'id': 2,
+        'username': 'facility_manager',
+        'role': 'facility_manager',
+        'email': 'fm@example.com'
+    },
+    'regular_user': {
+        'id': 3,
+        'username': 'user',
+        'role': 'regular_user',
+        'email': 'user@example.com'
+    }
+}
 
-class TestRoomCreation:
-    """Tests for room creation endpoint."""
 
-    def test_create_room_success(self, client, mock_auth, auth_headers):
-        """Test successful room creation."""
-        response = client.post('/api/rooms/',
-                              headers=auth_headers,
-                              json={
-                                  'name': 'Conference Room A',
-                                  'capacity': 10,
-                                  'equipment': ['Projector', 'Whiteboard'],
-                                  'location': 'Building 1, Floor 2'
-                              })
+_auth_state = threading.local()
 
-        assert response.status_code == 201
-        data = response.get_json()
-        assert data['message'] == 'Room created successfully'
-        assert data['room']['name'] == 'Conference Room A'
-        assert data['room']['capacity'] == 10
-        assert 'Projector' in data['room']['equipment']
 
-    def test_create_room_as_facility_manager(self, client, mock_facility_manager_auth, auth_headers):
-        """Test room creation as facility manager."""
-        response = client.post('/api/rooms/',
-                              headers=auth_headers,
-                              json={
-                                  'name': 'Meeting Room B',
-                                  'capacity': 5,
-                                  'equipment': ['TV Screen'],
-                                  'location': 'Building 2, Floor 1'
-                              })
+@pytest.fixture(scope='session', autouse=True)
+def stub_users_service():
+    """Answer user lookups from the acting test user instead of over HTTP."""
+    with swap_attr(auth, 'get_user_from_token', lambda: getattr(_auth_state, 'user', None)):
+        yield
 
-        assert response.status_code == 201
 
-    def test_create_room_duplicate_name(self, client, mock_auth, auth_headers):
-        """Test creating room with duplicate name."""
-        # Create first room
-        client.post('/api/rooms/',
-                   headers=auth_headers,
-                   json={
-                       'name': 'Conference Room A',
-                       'capacity': 10,
-                       'equipment': [],
-                       'location': 'Building 1'
-                   })
-
-        # Try to create duplicate
-        response = client.post('/api/rooms/',
-                              headers=auth_headers,
-                              json={
-                                  'name': 'Conference Room A',
-                                  'capacity': 5,
-                                  'equipment': [],
-                                  'location': 'Building 2'
-                              })
+def _act_as(role):
+    """Make subsequent requests in this test run as the given role."""
+    _auth_state.user = TEST_USERS[role]
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert 'already exists' in data['error'].lower()
 
-    def test_create_room_invalid_capacity(self, client, mock_auth, auth_headers):
-        """Test creating room with invalid capacity."""
-        response = client.post('/api/rooms/',
-                              headers=auth_headers,
-                              json={
-                                  'name': 'Conference Room A',
-                                  'capacity': -5,  # Invalid
-                                  'equipment': [],
-                                  'location': 'Building 1'
-                              })
+@pytest.fixture(autouse=True)
+def acting_user(request):
+    """Select the acting user from the test's ``role`` marker, if any."""
+    marker = request.node.get_closest_marker('role')
+    if marker:
+        _act_as(marker.args[0])
+    yield
+    _auth_state.user = None
 
-        assert response.status_code == 400
 
-    def test_create_room_missing_fields(self, client, mock_auth, auth_headers):
-        """Test creating room with missing required fields."""
-        response = client.post('/api/rooms/',
-                              headers=auth_headers,
-                              json={
-                                  'name': 'Conference Room A',
-                                  'capacity': 10
-                              })
+@pytest.fixture(scope='session')
+def auth_headers(app):
+    """Auth headers carrying a real JWT so ``jwt_required`` accepts them."""
+    with app.app_context():
+        token = create_access_token(identity='1')
 
-        assert response.status_code == 400
-        data = response.get_json()
-        assert 'missing required fields' in data['error'].lower()
+    return {'Authorization': f'Bearer {token}'}
 
-    def test_create_room_unauthorized(self, client, mock_regular_user_auth, auth_headers):
-        """Test creating room as regular user (should fail)."""
-        response = client.post('/api/rooms/',
-                              headers=auth_headers,
-                              json={
-                                  'name': 'Conference Room A',
-                                  'capacity': 10,
-                                  'equipment': [],
-                                  'location': 'Building 1'
-                              })
 
-        assert response.status_code == 403
+def _post_room(client, headers, payload):
+    """POST a room creation request."""
+    return client.post('/api/rooms/', headers=headers, json=payload)
+
+
+class TestRoomCreation:
+    """Tests for room creation endpoint."""
+
+    @pytest.mark.role('admin')
+    def test_create_room(self, client, auth_headers, subtests):
+        """Test room creation success, validation and permission cases."""
+        with subtests.test(case='success'):
+            response = _post_room(client, auth_headers, {
+                'name': 'Conference Room A',
+                'capacity': 10,
+                'equipment': ['Projector', 'Whiteboard'],
+                'location': 'Building 1, Floor 2'
+            })
+
+            assert response.status_code == 201
+            data = response.get_json()
+            assert data['message'] == 'Room created successfully'
+            assert data['room']['name'] == 'Conference Room A'
+            assert data['room']['capacity'] == 10
+            assert 'Projector' in data['room']['equipment']
+
+        with subtests.test(case='duplicate_name'):
+            response = _post_room(client, auth_headers, {
+                'name': 'Conference Room A',
+                'capacity': 5,
+                'equipment': [],
+                'location': 'Building 2'
+            })
+
+            assert response.status_code == 400
+            data = response.get_json()
+            assert 'already exists' in data['error'].lower()
+
+        with subtests.test(case='invalid_capacity'):
+            response = _post_room(client, auth_headers, {
+                'name': 'Conference Room B',
+                'capacity': -5,  # Invalid
+                'equipment': [],
+                'location': 'Building 1'
+            })
+
+            assert response.status_code == 400
+
+        with subtests.test(case='missing_fields'):
+            response = _post_room(client, auth_headers, {
+                'name': 'Conference Room B',
+                'capacity': 10
+            })
+
+            assert response.status_code == 400
+            data = response.get_json()
+            assert 'missing required fields' in data['error'].lower()
+
+        with subtests.test(case='unauthorized'):
+            _act_as('regular_user')
+            response = _post_room(client, auth_headers, {
+                'name': 'Conference Room B',
+                'capacity': 10,
+                'equipment': [],
+                'location': 'Building 1'
+            })
+
+            assert response.status_code == 403
+
+    @pytest.mark.role('facility_manager')
+    def test_create_room_as_facility_manager(self, client, auth_headers):
+        """Test room creation as facility manager."""
+        response = _post_room(client, auth_headers, {
+            'name': 'Meeting Room B',
+            'capacity': 5,
+            'equipment': ['TV Screen'],
+            'location': 'Building 2, Floor 1'
+        })
+
+        assert response.status_code == 201
 
 
 class TestRoomRetrieval:
     """Tests for room retrieval endpoints."""
 
-    def test_get_all_rooms(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_get_all_rooms(self, client, auth_headers):
         """Test getting all rooms."""
         # Create test rooms
-        with app.app_context():
-            room1 = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            room2 = Room(name='Room B', capacity=5, location='Building 2', status='available')
-            db.session.add_all([room1, room2])
-            db.session.commit()
+        seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'},
+            {'name': 'Room B', 'capacity': 5, 'location': 'Building 2'}
+        ])
 
         response = client.get('/api/rooms/', headers=auth_headers)
 
@@ -202,13 +207,12 @@ class TestRoomRetrieval:
         assert 'rooms' in data
         assert data['count'] == 2
 
-    def test_get_room_by_id(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_get_room_by_id(self, client, auth_headers):
         """Test getting a specific room by ID."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.get(f'/api/rooms/{room_id}', headers=auth_headers)
 
@@ -216,7 +220,8 @@ class TestRoomRetrieval:
         data = response.get_json()
         assert data['room']['name'] == 'Room A'
 
-    def test_get_nonexistent_room(self, client, mock_auth, auth_headers):
+    @pytest.mark.role('admin')
+    def test_get_nonexistent_room(self, client, auth_headers):
         """Test getting a nonexistent room."""
         response = client.get('/api/rooms/9999', headers=auth_headers)
 
@@ -226,13 +231,13 @@ class TestRoomRetrieval:
 class TestRoomSearch:
     """Tests for room search endpoint."""
 
-    def test_search_by_capacity(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_search_by_capacity(self, client, auth_headers):
         """Test searching rooms by capacity."""
-        with app.app_context():
-            room1 = Room(name='Small Room', capacity=5, location='Building 1', status='available')
-            room2 = Room(name='Large Room', capacity=20, location='Building 2', status='available')
-            db.session.add_all([room1, room2])
-            db.session.commit()
+        seed_rooms([
+            {'name': 'Small Room', 'capacity': 5, 'location': 'Building 1'},
+            {'name': 'Large Room', 'capacity': 20, 'location': 'Building 2'}
+        ])
 
         response = client.get('/api/rooms/search?capacity=10', headers=auth_headers)
 
@@ -241,49 +246,49 @@ class TestRoomSearch:
         assert data['count'] == 1
         assert data['rooms'][0]['name'] == 'Large Room'
 
-    def test_search_by_location(self, client, mock_auth, auth_headers, app):
+
+class TestRoomServiceUnit:
+    """Tests for RoomService search logic, called directly without HTTP."""
+
+    def test_search_by_location(self):
         """Test searching rooms by location."""
-        with app.app_context():
-            room1 = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            room2 = Room(name='Room B', capacity=10, location='Building 2', status='available')
-            db.session.add_all([room1, room2])
-            db.session.commit()
+        seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'},
+            {'name': 'Room B', 'capacity': 10, 'location': 'Building 2'}
+        ])
 
-        response = client.get('/api/rooms/search?location=Building 1', headers=auth_headers)
+        rooms = RoomService.search_available_rooms(location='Building 1')
 
-        assert response.status_code == 200
-        data = response.get_json()
-        assert data['count'] == 1
-        assert data['rooms'][0]['location'] == 'Building 1'
+        assert len(rooms) == 1
+        assert rooms[0].location == 'Building 1'
 
-    def test_search_by_equipment(self, client, mock_auth, auth_headers, app):
+    def test_search_by_equipment(self):
         """Test searching rooms by equipment."""
-        with app.app_context():
-            room1 = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            room1.set_equipment_list(['Projector', 'Whiteboard'])
-            room2 = Room(name='Room B', capacity=10, location='Building 2', status='available')
-            room2.set_equipment_list(['TV Screen'])
-            db.session.add_all([room1, room2])
-            db.session.commit()
+        seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1', 'equipment': 'Projector, Whiteboard'},
+            {'name': 'Room B', 'capacity': 10, 'location': 'Building 2', 'equipment': 'TV Screen'}
+        ])
 
-        response = client.get('/api/rooms/search?equipment=Projector', headers=auth_headers)
+        rooms = RoomService.search_available_rooms(equipment=['Projector'])
 
-        assert response.status_code == 200
-        data = response.get_json()
-        assert data['count'] == 1
-        assert data['rooms'][0]['name'] == 'Room A'
+        assert len(rooms) == 1
+        assert rooms[0].name == 'Room A'
+
+    def test_search_invalid_capacity(self):
+        """Test that an invalid capacity filter is rejected."""
+        with pytest.raises(ValidationError):
+            RoomService.search_available_rooms(capacity=0)
 
 
 class TestRoomUpdate:
     """Tests for room update endpoint."""
 
-    def test_update_room_success(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_update_room_success(self, client, auth_headers):
         """Test successful room update."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.put(f'/api/rooms/{room_id}',
                              headers=auth_headers,
@@ -297,39 +302,41 @@ class TestRoomUpdate:
         assert data['room']['name'] == 'Updated Room A'
         assert data['room']['capacity'] == 15
 
-    def test_update_room_as_facility_manager(self, client, mock_facility_manager_auth, auth_headers, app):
+    @pytest.mark.role('facility_manager')
+    def test_update_room_as_facility_manager(self, client, auth_headers):
         """Test updating room as facility manager."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.put(f'/api/rooms/{room_id}',
                              headers=auth_headers,
-                             json={'capacity': 12})
+                             data=CAPACITY_UPDATE,
+                             content_type='application/json')
 
         assert response.status_code == 200
 
-    def test_update_room_unauthorized(self, client, mock_regular_user_auth, auth_headers, app):
+    @pytest.mark.role('regular_user')
+    def test_update_room_unauthorized(self, client, auth_headers):
         """Test updating room as regular user (should fail)."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.put(f'/api/rooms/{room_id}',
                              headers=auth_headers,
-                             json={'capacity': 12})
+                             data=CAPACITY_UPDATE,
+                             content_type='application/json')
 
         assert response.status_code == 403
 
-    def test_update_nonexistent_room(self, client, mock_auth, auth_headers):
+    @pytest.mark.role('admin')
+    def test_update_nonexistent_room(self, client, auth_headers):
         """Test updating nonexistent room."""
         response = client.put('/api/rooms/9999',
                              headers=auth_headers,
-                             json={'capacity': 12})
+                             data=CAPACITY_UPDATE,
+                             content_type='application/json')
 
         assert response.status_code == 404
 
@@ -337,13 +344,12 @@ class TestRoomUpdate:
 class TestRoomDeletion:
     """Tests for room deletion endpoint."""
 
-    def test_delete_room_success(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_delete_room_success(self, client, auth_headers):
         """Test successful room deletion."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.delete(f'/api/rooms/{room_id}', headers=auth_headers)
 
@@ -353,31 +359,30 @@ class TestRoomDeletion:
         response = client.get(f'/api/rooms/{room_id}', headers=auth_headers)
         assert response.status_code == 404
 
-    def test_delete_room_as_facility_manager(self, client, mock_facility_manager_auth, auth_headers, app):
+    @pytest.mark.role('facility_manager')
+    def test_delete_room_as_facility_manager(self, client, auth_headers):
         """Test deleting room as facility manager."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.delete(f'/api/rooms/{room_id}', headers=auth_headers)
 
         assert response.status_code == 200
 
-    def test_delete_room_unauthorized(self, client, mock_regular_user_auth, auth_headers, app):
+    @pytest.mark.role('regular_user')
+    def test_delete_room_unauthorized(self, client, auth_headers):
         """Test deleting room as regular user (should fail)."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.delete(f'/api/rooms/{room_id}', headers=auth_headers)
 
         assert response.status_code == 403
 
-    def test_delete_nonexistent_room(self, client, mock_auth, auth_headers):
+    @pytest.mark.role('admin')
+    def test_delete_nonexistent_room(self, client, auth_headers):
         """Test deleting nonexistent room."""
         response = client.delete('/api/rooms/9999', headers=auth_headers)
 
@@ -387,13 +392,12 @@ class TestRoomDeletion:
 class TestRoomStatusUpdate:
     """Tests for room status update endpoint."""
 
-    def test_update_room_status(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_update_room_status(self, client, auth_headers):
         """Test updating room status."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.patch(f'/api/rooms/{room_id}/status',
                                headers=auth_headers,
@@ -403,13 +407,12 @@ class TestRoomStatusUpdate:
         data = response.get_json()
         assert data['room']['status'] == 'out_of_service'
 
-    def test_update_room_status_invalid(self, client, mock_auth, auth_headers, app):
+    @pytest.mark.role('admin')
+    def test_update_room_status_invalid(self, client, auth_headers):
         """Test updating room status with invalid value."""
-        with app.app_context():
-            room = Room(name='Room A', capacity=10, location='Building 1', status='available')
-            db.session.add(room)
-            db.session.commit()
-            room_id = room.id
+        [room_id] = seed_rooms([
+            {'name': 'Room A', 'capacity': 10, 'location': 'Building 1'}
+        ])
 
         response = client.patch(f'/api/rooms/{room_id}/status',
                                headers=auth_headers,
@@ -421,7 +424,8 @@ class TestRoomStatusUpdate:
 class TestInputValidation:
     """Tests for input validation and sanitization."""
 
-    def test_sanitize_xss_attempt(self, client, mock_auth, auth_headers):
+    @pytest.mark.role('admin')
+    def test_sanitize_xss_attempt(self, client, auth_headers):
         """Test that XSS attempts are sanitized."""
         response = client.post('/api/rooms/',
                               headers=auth_headers,
@@ -437,7 +441,8 @@ class TestInputValidation:
         # Script tags should be removed
         assert '<script>' not in data['room']['name']
 
-    def test_validate_room_name_format(self, client, mock_auth, auth_headers):
+    @pytest.mark.role('admin')
+    def test_validate_room_name_format(self, client, auth_headers):
         """Test room name format validation."""
         response = client.post('/api/rooms/',
                               headers=auth_headers,
@@ -450,7 +455,8 @@ class TestInputValidation:
 
         assert response.status_code == 400
 
-    def test_validate_equipment_format(self, client, mock_auth, auth_headers):
+    @pytest.mark.role('admin')
+    def test_validate_equipment_format(self, client, auth_headers):
         """Test equipment validation."""
         response = client.post('/api/rooms/',
                               headers=auth_headers,
@@ -4,61 +4,113 @@ Unit Tests for Users Service
 This module contains comprehensive unit tests for the Users Service API endpoints.
 """
 
+import json
 import pytest
 import sys
 import os
+from datetime import timedelta
+from flask_jwt_extended import JWTManager, create_access_token, decode_token
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from users_service.app import create_app, db
+from flask_caching.backends import SimpleCache
+from users_service.app import cache, create_app, db
+from users_service.extensions import DECODED_TOKENS_EXTENSION, jwt
 from users_service.domain.models import User
 from users_service.application.services import UserService
+from users_service.application import caching
 from users_service.application.validators import ValidationError
+from tests.conftest import rollback_session, swap_attr
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def app():
-    """Create and configure a test application instance."""
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    """Create the test application and its schema once per test session."""
+    app = create_app(config={
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'TESTING': True,
+        'BCRYPT_ROUNDS': 4,
+        # Cached responses would outlive the per-test rollback
+        'CACHE_TYPE': 'NullCache',
+    })
 
     with app.app_context():
         db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
 
+    return app
 
-@pytest.fixture
+
+@pytest.fixture(autouse=True)
+def db_session(app):
+    """
+    Push one app context per test and roll back everything the test writes.
+
+    Tests can use ``db.session`` directly without their own app context.
+    """
+    with app.app_context(), rollback_session(db) as session:
+        yield session
+
+
+@pytest.fixture(scope='session')
 def client(app):
     """Create a test client for the application."""
     return app.test_client()
 
 
+@pytest.fixture(scope='session')
+def auth_headers(app):
+    """
+    Create an admin user once per session and return auth headers for it.
+
+    The admin is committed before any per-test transaction begins, so the
+    rollbacks keep it. The token is minted directly instead of logging in.
+    """
+    with app.app_context():
+        admin = User(
+            name='Admin User',
+            username='admin',
+            email='admin@example.com',
+            role='admin'
+        )
+        admin.set_password('Admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+        token = create_access_token(identity=admin.id, additional_claims={'role': admin.role})
+
+    return {'Authorization': f'Bearer {token}'}
+
+
 @pytest.fixture
-def auth_headers(client):
-    """Create an authenticated admin user and return auth headers."""
-    # Register admin user
-    response = client.post('/api/users/register', json={
-        'name': 'Admin User',
-        'username': 'admin',
-        'password': 'Admin123',
-        'email': 'admin@example.com',
-        'role': 'admin'
-    })
+def response_cache(app):
+    """Give one test a real in-process response cache instead of NullCache."""
+    original = app.extensions['cache'][cache]
+    app.extensions['cache'][cache] = SimpleCache()
 
-    # Login
-    response = client.post('/api/users/login', json={
-        'username': 'admin',
-        'password': 'Admin123'
-    })
+    yield app.extensions['cache'][cache]
 
-    data = response.get_json()
-    token = data['access_token']
+    app.extensions['cache'][cache] = original
 
-    return {'Authorization': f'Bearer {token}'}
+
+class _UnreachableCache(SimpleCache):
+    """Cache backend that fails like a Redis server that is down."""
+
+    def _fail(self, *args, **kwargs):
+        raise ConnectionError('cache unreachable')
+
+    get = set = add = delete = delete_many = get_many = set_many = _fail
+
+
+@pytest.fixture
+def unreachable_cache(app):
+    """Make every cache call fail for one test."""
+    original = app.extensions['cache'][cache]
+    app.extensions['cache'][cache] = _UnreachableCache()
+
+    yield
+
+    app.extensions['cache'][cache] = original
 
 
 class TestUserRegistration:
@@ -81,27 +133,33 @@ class TestUserRegistration:
         assert data['user']['email'] == 'john@example.com'
         assert data['user']['role'] == 'regular_user'
 
-    def test_register_duplicate_username(self, client):
-        """Test registration with duplicate username."""
-        # Create first user
-        client.post('/api/users/register', json={
+    @pytest.mark.parametrize('field, message', [
+        ('username', 'already exists'),
+        ('email', 'already registered'),
+    ])
+    def test_register_duplicate(self, client, field, message):
+        """Test registration with a username or email that is already taken."""
+        first = {
             'name': 'John Doe',
             'username': 'johndoe',
             'password': 'SecurePass123',
             'email': 'john@example.com'
-        })
+        }
+        client.post('/api/users/register', json=first)
 
-        # Try to create user with same username
-        response = client.post('/api/users/register', json={
+        # Reuse only the field under test
+        second = {
             'name': 'Jane Doe',
-            'username': 'johndoe',
+            'username': 'janedoe',
             'password': 'AnotherPass123',
-            'email': 'jane@example.com'
-        })
+            'email': 'jane@example.com',
+            field: first[field]
+        }
+        response = client.post('/api/users/register', json=second)
 
         assert response.status_code == 400
         data = response.get_json()
-        assert 'already exists' in data['error'].lower()
+        assert message in data['error'].lower()
 
     def test_register_invalid_email(self, client):
         """Test registration with invalid email."""
@@ -129,6 +187,20 @@ class TestUserRegistration:
         data = response.get_json()
         assert 'validation error' in data['error'].lower()
 
+    @pytest.mark.parametrize('body, error', [
+        ('', 'no data provided'),
+        ('{}', 'no data provided'),
+        ('{"name": ', 'json object'),
+        ('["johndoe"]', 'json object'),
+    ], ids=['empty', 'empty_object', 'malformed', 'array'])
+    def test_register_invalid_body(self, client, body, error):
+        """Test registration with an empty or non-object JSON body."""
+        response = client.post('/api/users/register', data=body,
+                               content_type='application/json')
+
+        assert response.status_code == 400
+        assert error in response.get_json()['error'].lower()
+
     def test_register_missing_fields(self, client):
         """Test registration with missing required fields."""
         response = client.post('/api/users/register', json={
@@ -165,6 +237,24 @@ class TestUserAuthentication:
         assert 'access_token' in data
         assert data['message'] == 'Login successful'
 
+    def test_login_token_carries_role(self, client):
+        """Test that the access token includes the user's role claim."""
+        client.post('/api/users/register', json={
+            'name': 'John Doe',
+            'username': 'johndoe',
+            'password': 'SecurePass123',
+            'email': 'john@example.com',
+            'role': 'auditor'
+        })
+
+        response = client.post('/api/users/login', json={
+            'username': 'johndoe',
+            'password': 'SecurePass123'
+        })
+
+        claims = decode_token(response.get_json()['access_token'])
+        assert claims['role'] == 'auditor'
+
     def test_login_invalid_credentials(self, client):
         """Test login with invalid credentials."""
         # Register user
@@ -194,11 +284,14 @@ class TestUserAuthentication:
 
         assert response.status_code == 401
 
-    def test_login_missing_credentials(self, client):
+    @pytest.mark.parametrize('credentials', [
+        {'username': 'johndoe'},
+        {'password': 'SecurePass123'},
+        {},
+    ], ids=['no_password', 'no_username', 'empty'])
+    def test_login_missing_credentials(self, client, credentials):
         """Test login with missing credentials."""
-        response = client.post('/api/users/login', json={
-            'username': 'johndoe'
-        })
+        response = client.post('/api/users/login', json=credentials)
 
         assert response.status_code == 400
 
@@ -223,6 +316,48 @@ class TestUserRetrieval:
         assert 'users' in data
         assert data['count'] >= 2  # At least admin and janedoe
 
+    def test_get_all_users_paginated(self, client, auth_headers):
+        """Test paging through users with limit and offset."""
+        client.post('/api/users/register', json={
+            'name': 'Jane Doe',
+            'username': 'janedoe',
+            'password': 'SecurePass123',
+            'email': 'jane@example.com'
+        })
+
+        response = client.get('/api/users/?limit=1&offset=1', headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 1
+        assert data['limit'] == 1
+        assert data['offset'] == 1
+        assert data['users'][0]['username'] == 'janedoe'
+
+    @pytest.mark.parametrize('query', ['limit=0', 'limit=abc', 'offset=-1'])
+    def test_get_all_users_invalid_pagination(self, client, auth_headers, query):
+        """Test listing users with invalid pagination parameters."""
+        response = client.get(f'/api/users/?{query}', headers=auth_headers)
+
+        assert response.status_code == 400
+
+    def test_get_all_users_streamed(self, client, auth_headers):
+        """Test streaming every user as newline-delimited JSON."""
+        client.post('/api/users/register', json={
+            'name': 'Jane Doe',
+            'username': 'janedoe',
+            'password': 'SecurePass123',
+            'email': 'jane@example.com'
+        })
+
+        response = client.get('/api/users/?stream=1', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        users = [json.loads(line) for line in response.data.splitlines()]
+        assert [user['username'] for user in users] == ['admin', 'janedoe']
+        assert 'password_hash' not in users[0]
+
     def test_get_all_users_unauthorized(self, client):
         """Test getting all users without authentication."""
         response = client.get('/api/users/')
@@ -237,6 +372,27 @@ class TestUserRetrieval:
         data = response.get_json()
         assert data['user']['username'] == 'admin'
 
+    def test_regular_user_profile_access(self, client, auth_headers):
+        """Test that a regular user can view only their own profile."""
+        client.post('/api/users/register', json={
+            'name': 'Jane Doe',
+            'username': 'janedoe',
+            'password': 'SecurePass123',
+            'email': 'jane@example.com'
+        })
+        response = client.post('/api/users/login', json={
+            'username': 'janedoe',
+            'password': 'SecurePass123'
+        })
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+        response = client.get('/api/users/janedoe', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['user']['username'] == 'janedoe'
+
+        response = client.get('/api/users/admin', headers=headers)
+        assert response.status_code == 403
+
     def test_get_nonexistent_user(self, client, auth_headers):
         """Test getting a nonexistent user."""
         response = client.get('/api/users/nonexistent', headers=auth_headers)
@@ -338,6 +494,203 @@ class TestUserDeletion:
 
         assert response.status_code == 404
 
+    def test_bulk_delete_users(self, client, auth_headers):
+        """Test deleting several users in one request."""
+        user_ids = []
+        for username in ('janedoe', 'johndoe'):
+            response = client.post('/api/users/register', json={
+                'name': 'Jane Doe',
+                'username': username,
+                'password': 'SecurePass123',
+                'email': f'{username}@example.com'
+            })
+            user_ids.append(response.get_json()['user']['id'])
+
+        response = client.delete('/api/users/bulk', headers=auth_headers,
+                                 json={'user_ids': user_ids + [9999]})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert sorted(data['deleted']) == sorted(user_ids)
+        assert data['count'] == 2
+
+        response = client.get('/api/users/janedoe', headers=auth_headers)
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('user_ids', [[], 'all', [1, 'two'], [True]],
+                             ids=['empty', 'not_list', 'not_int', 'bool'])
+    def test_bulk_delete_invalid_ids(self, client, auth_headers, user_ids):
+        """Test bulk deletion with an invalid ID list."""
+        response = client.delete('/api/users/bulk', headers=auth_headers,
+                                 json={'user_ids': user_ids})
+
+        assert response.status_code == 400
+
+
+class TestResponseCaching:
+    """Tests for cached read responses."""
+
+    def test_update_invalidates_cached_user(self, client, auth_headers, response_cache):
+        """Test that cached profile and list responses are dropped on update."""
+        # Only some of the user's entries are cached when the update happens
+        response = client.get('/api/users/me', headers=auth_headers)
+        user_id = response.get_json()['user']['id']
+        client.get('/api/users/', headers=auth_headers)
+
+        client.put(f'/api/users/{user_id}', headers=auth_headers, json={'name': 'Updated Name'})
+
+        response = client.get('/api/users/me', headers=auth_headers)
+        assert response.get_json()['user']['name'] == 'Updated Name'
+        response = client.get('/api/users/', headers=auth_headers)
+        assert response.get_json()['users'][0]['name'] == 'Updated Name'
+
+    def test_fill_racing_an_update_is_not_served(self, client, auth_headers, response_cache):
+        """Test that a response read before an update can't be cached after it."""
+        response = client.get('/api/users/me', headers=auth_headers)
+        user = response.get_json()['user']
+        # A slow request builds its keys and reads the row before the update...
+        me_key = caching.me_key(user['id'])
+        user_key = caching.user_key(user['username'])
+        stale = caching.encode({'user': user})
+
+        client.put(f'/api/users/{user["id"]}', headers=auth_headers, json={'name': 'Updated Name'})
+
+        # ...and stores what it read once the update has been invalidated
+        caching.store(me_key, stale)
+        caching.store(user_key, stale)
+
+        response = client.get('/api/users/me', headers=auth_headers)
+        assert response.get_json()['user']['name'] == 'Updated Name'
+        response = client.get(f'/api/users/{user["username"]}', headers=auth_headers)
+        assert response.get_json()['user']['name'] == 'Updated Name'
+
+    def test_login_primes_profile_cache(self, client, response_cache):
+        """Test that logging in caches the user's profile response."""
+        client.post('/api/users/register', json={
+            'name': 'John Doe',
+            'username': 'johndoe',
+            'password': 'SecurePass123',
+            'email': 'john@example.com'
+        })
+
+        response = client.post('/api/users/login', json={
+            'username': 'johndoe',
+            'password': 'SecurePass123'
+        })
+        user_id = response.get_json()['user']['id']
+
+        cached = json.loads(response_cache.get(caching.me_key(user_id)))
+        assert cached['user']['username'] == 'johndoe'
+
+    def test_login_with_cache_down(self, client, unreachable_cache):
+        """Test that a failed profile cache warm-up doesn't fail the login."""
+        client.post('/api/users/register', json={
+            'name': 'John Doe',
+            'username': 'johndoe',
+            'password': 'SecurePass123',
+            'email': 'john@example.com'
+        })
+
+        response = client.post('/api/users/login', json={
+            'username': 'johndoe',
+            'password': 'SecurePass123'
+        })
+
+        assert response.status_code == 200
+        assert 'access_token' in response.get_json()
+
+
+    def test_cache_outage_is_a_miss(self, client, auth_headers, unreachable_cache):
+        """Test that reads and writes still succeed when the cache is down."""
+        response = client.post('/api/users/register', json={
+            'name': 'John Doe',
+            'username': 'johndoe',
+            'password': 'SecurePass123',
+            'email': 'john@example.com'
+        })
+        assert response.status_code == 201
+        user_id = response.get_json()['user']['id']
+
+        assert client.get('/api/users/', headers=auth_headers).status_code == 200
+        assert client.get('/api/users/johndoe', headers=auth_headers).status_code == 200
+        assert client.get('/api/users/me', headers=auth_headers).status_code == 200
+
+        response = client.put(f'/api/users/{user_id}', headers=auth_headers, json={'name': 'Jane Doe'})
+        assert response.status_code == 200
+        response = client.delete(f'/api/users/{user_id}', headers=auth_headers)
+        assert response.status_code == 200
+
+
+class TestTokenClaimCache:
+    """Tests for the cache of verified JWT claims."""
+
+    @staticmethod
+    def _token_for_admin(auth_headers, **kwargs):
+        """Mint a new token for the session admin."""
+        admin_id = decode_token(auth_headers['Authorization'].split()[1])['sub']
+        return create_access_token(identity=admin_id, additional_claims={'role': 'admin'}, **kwargs)
+
+    @staticmethod
+    def _count_full_decodes():
+        """Count the decodes that reach flask-jwt-extended's verification."""
+        calls = []
+        original = JWTManager._decode_jwt_from_config
+
+        def counting_decode(self, *args, **kwargs):
+            calls.append(args[0])
+            return original(self, *args, **kwargs)
+
+        return calls, swap_attr(JWTManager, '_decode_jwt_from_config', counting_decode)
+
+    def test_repeated_token_hits_cache(self, client, auth_headers):
+        """Test that a token is only verified on its first use."""
+        headers = {'Authorization': f'Bearer {self._token_for_admin(auth_headers)}'}
+        calls, patched = self._count_full_decodes()
+
+        with patched:
+            assert client.get('/api/users/me', headers=headers).status_code == 200
+            assert client.get('/api/users/me', headers=headers).status_code == 200
+
+        assert len(calls) == 1
+
+    def test_tampered_token_is_verified(self, client, auth_headers):
+        """Test that changing a cached token forces a full, failing decode."""
+        token = self._token_for_admin(auth_headers)
+        client.get('/api/users/me', headers={'Authorization': f'Bearer {token}'})
+
+        header, payload, signature = token.split('.')
+        tampered = '.'.join((header, payload, signature[::-1]))
+        calls, patched = self._count_full_decodes()
+
+        with patched:
+            response = client.get('/api/users/me', headers={'Authorization': f'Bearer {tampered}'})
+
+        assert response.status_code == 422
+        assert calls == [tampered]
+
+    def test_expired_cached_token_rejected(self, app, client, auth_headers):
+        """Test that cached claims are not reused once the token has expired."""
+        token = self._token_for_admin(auth_headers, expires_delta=timedelta(seconds=-10))
+        decoded_tokens = app.extensions[DECODED_TOKENS_EXTENSION]
+        decoded_tokens[jwt.token_key(token)] = decode_token(token, allow_expired=True)
+
+        response = client.get('/api/users/me', headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 401
+
+    def test_cache_is_per_app(self, client, auth_headers):
+        """Test that a token verified by one app is not trusted by another."""
+        other_app = create_app(config={
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'TESTING': True,
+            'JWT_SECRET_KEY': 'a-different-secret',
+        })
+        assert client.get('/api/users/me', headers=auth_headers).status_code == 200
+
+        response = other_app.test_client().get('/api/users/me', headers=auth_headers)
+
+        assert response.status_code == 422
+
 
 class TestInputValidation:
     """Tests for input validation and sanitization."""
@@ -367,33 +720,20 @@ class TestInputValidation:
 
         assert response.status_code == 400
 
-    def test_password_strength_requirements(self, client):
+    @pytest.mark.parametrize('password', [
+        'securepass123',  # No uppercase
+        'SECUREPASS123',  # No lowercase
+        'SecurePassword',  # No digit
+    ])
+    def test_password_strength_requirements(self, client, password):
         """Test password strength requirements."""
-        # No uppercase
         response = client.post('/api/users/register', json={
             'name': 'John Doe',
             'username': 'johndoe',
-            'password': 'securepass123',
+            'password': password,
             'email': 'john@example.com'
         })
-        assert response.status_code == 400
 
-        # No lowercase
-        response = client.post('/api/users/register', json={
-            'name': 'John Doe',
-            'username': 'johndoe',
-            'password': 'SECUREPASS123',
-            'email': 'john@example.com'
-        })
-        assert response.status_code == 400
-
-        # No digit
-        response = client.post('/api/users/register', json={
-            'name': 'John Doe',
-            'username': 'johndoe',
-            'password': 'SecurePassword',
-            'email': 'john@example.com'
-        })
         assert response.status_code == 400
 
 
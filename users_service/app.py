@@ -6,22 +6,102 @@ It handles user management with Admin role support.
 """
 
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask.json.provider import DefaultJSONProvider
+from functools import lru_cache
+from sqlalchemy.pool import StaticPool
+import orjson
 import os
 
-db = SQLAlchemy()
-jwt = JWTManager()
+from users_service.extensions import cache, db, jwt
+from users_service.domain import models  # noqa: F401  (registers the tables)
+from users_service.presentation import routes
 
 
-def create_app():
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask's default JSON provider with orjson doing the encoding and decoding.
+
+    orjson serializes datetimes as ISO 8601 natively. Types it doesn't know
+    go through ``DefaultJSONProvider.default``, and ``sort_keys`` and
+    ``indent`` are honoured like the stdlib-based provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        """Serialize ``obj`` to a JSON string."""
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes."""
+        return orjson.loads(s)
+
+
+def _engine_options(database_uri):
+    """
+    Build SQLAlchemy engine options for a database URI.
+
+    Server databases get an explicitly sized connection pool (tunable with
+    ``DB_POOL_SIZE`` and ``DB_MAX_OVERFLOW``) that checks connections before
+    use. An in-memory SQLite database shares one connection so every session
+    sees the same schema.
+
+    Args:
+        database_uri (str): SQLAlchemy database URI
+
+    Returns:
+        dict: Options for ``SQLALCHEMY_ENGINE_OPTIONS``
+    """
+    if database_uri.startswith('sqlite'):
+        if ':memory:' in database_uri or database_uri in ('sqlite://', 'sqlite:///'):
+            return {
+                'poolclass': StaticPool,
+                'connect_args': {'check_same_thread': False},
+            }
+        return {}
+
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': 30,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+
+
+def create_app(config=None):
     """
     Create and configure the Flask application.
 
+    Apps are cached per set of overrides, so repeated calls with the same
+    settings return the same instance instead of rebuilding it.
+
+    Args:
+        config (dict, optional): Settings that override the environment-based
+            defaults. Values must be hashable.
+
+    Returns:
+        Flask: Configured Flask application instance
+    """
+    return _build_app(tuple(sorted((config or {}).items())))
+
+
+@lru_cache(maxsize=None)
+def _build_app(config_items):
+    """
+    Build the Flask application for one set of config overrides.
+
+    Args:
+        config_items (tuple): Sorted ``(key, value)`` override pairs
+
     Returns:
         Flask: Configured Flask application instance
     """
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
 
     # Configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
@@ -31,21 +111,35 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 3600  # 1 hour
+    # bcrypt work factor; each step down halves the cost of hashing a password
+    app.config['BCRYPT_ROUNDS'] = int(os.getenv('BCRYPT_ROUNDS', 12))
+    # Cached read responses; use Redis when several workers must share them
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+    app.config['CACHE_TYPE'] = os.getenv(
+        'CACHE_TYPE',
+        'RedisCache' if app.config['CACHE_REDIS_URL'] else 'SimpleCache'
+    )
+    app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+
+    app.config.update(config_items)
+    app.config.setdefault(
+        'SQLALCHEMY_ENGINE_OPTIONS',
+        _engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    )
 
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
 
-    with app.app_context():
-        # Import models
-        from users_service.domain import models
-
-        # Create tables
-        db.create_all()
+    # Register blueprints
+    app.register_blueprint(routes.users_bp)
 
-        # Register blueprints
-        from users_service.presentation import routes
-        app.register_blueprint(routes.users_bp)
+    # Create tables only when asked to, so app workers don't each run DDL
+    # on boot (see users_service/init_db.py)
+    if os.getenv('INIT_DB') == '1':
+        with app.app_context():
+            db.create_all()
 
     return app
 
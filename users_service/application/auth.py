@@ -5,8 +5,9 @@ This module provides decorators and utilities for authentication and authorizati
 """
 
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import g, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from users_service.extensions import db
 from users_service.domain.models import User
 
 
@@ -14,6 +15,10 @@ def role_required(*allowed_roles):
     """
     Decorator to require specific roles for accessing an endpoint.
 
+    The role is read from the token's ``role`` claim, so a role change only
+    takes effect once the user logs in again (at most the token lifetime).
+    Tokens issued without the claim fall back to a database lookup.
+
     Args:
         *allowed_roles: Variable number of role names that are allowed
 
@@ -25,21 +30,27 @@ def role_required(*allowed_roles):
         def some_route():
             pass
     """
+    allowed = frozenset(allowed_roles)
+
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            role = get_jwt().get('role')
+
+            if role is None:
+                # Only the role is needed here, not the whole user row
+                user_id = get_jwt_identity()
+                role = db.session.query(User.role).filter(User.id == user_id).scalar()
 
-            if not user:
+            if role is None:
                 return jsonify({'error': 'User not found'}), 404
 
-            if user.role not in allowed_roles:
+            if role not in allowed:
                 return jsonify({
                     'error': 'Insufficient permissions',
                     'required_roles': list(allowed_roles),
-                    'your_role': user.role
+                    'your_role': role
                 }), 403
 
             return fn(*args, **kwargs)
@@ -51,9 +62,18 @@ def get_current_user():
     """
     Get the current authenticated user.
 
+    The user is loaded once per request and kept on ``flask.g``. The cached
+    entry is tied to the token identity because ``g`` can outlive a single
+    request when an app context is already pushed (e.g. in tests).
+
     Returns:
         User: Current user object or None
     """
     verify_jwt_in_request()
     user_id = get_jwt_identity()
-    return User.query.get(user_id)
+
+    if g.get('current_user_id') != user_id or 'current_user' not in g:
+        g.current_user = db.session.get(User, user_id)
+        g.current_user_id = user_id
+
+    return g.current_user
@@ -0,0 +1,236 @@
+"""
+Response Caching
+
+This module provides the cache keys and helpers used to serve user read
+endpoints from already-encoded JSON, and to invalidate them on writes.
+
+The cache is an optimization only: every helper here logs a failing cache
+backend and carries on as if the entry were missing.
+"""
+
+import uuid
+
+from flask import current_app
+from users_service.extensions import cache
+
+# Changing this value retires every cached page of the user list at once
+LIST_GENERATION_KEY = 'users:list:generation'
+# Per-user counterparts for the by-username and /me responses
+_USER_GENERATION_KEY = 'users:user:{}:generation'
+_ME_GENERATION_KEY = 'users:me:{}:generation'
+
+
+def user_key(username):
+    """
+    Cache key for a user looked up by username.
+
+    The key carries the user's current generation, so it must be built
+    before the user is read from the database: a response filled from a
+    read that raced with an update then lands on a retired key.
+
+    Args:
+        username (str): Username
+
+    Returns:
+        str: Cache key, or None if the generation could not be read
+    """
+    generation = _generation(_USER_GENERATION_KEY.format(username))
+    if generation is None:
+        return None
+    return f'users:user:{username}:{generation}'
+
+
+def me_key(user_id):
+    """
+    Cache key for a user's own profile.
+
+    Like ``user_key``, build it before reading the user.
+
+    Args:
+        user_id: User ID (JWT identity)
+
+    Returns:
+        str: Cache key, or None if the generation could not be read
+    """
+    generation = _generation(_ME_GENERATION_KEY.format(user_id))
+    if generation is None:
+        return None
+    return f'users:me:{user_id}:{generation}'
+
+
+def list_key(limit, offset):
+    """
+    Cache key for one page of the user list.
+
+    Args:
+        limit (int): Page size
+        offset (int): Number of users skipped
+
+    Returns:
+        str: Cache key
+    """
+    generation = _generation(LIST_GENERATION_KEY)
+    if generation is None:
+        return None
+    return f'users:list:{generation}:{limit}:{offset}'
+
+
+def _generation(key):
+    """
+    Read a generation counter.
+
+    Args:
+        key (str): Cache key of the counter
+
+    Returns:
+        str: Current generation, or None if the cache could not be read
+    """
+    try:
+        return cache.get(key) or '0'
+    except Exception as e:
+        current_app.logger.warning('Cache read of %s failed: %s', key, e)
+        return None
+
+
+def _bump_generation(key):
+    """
+    Move a generation counter on, retiring every entry built from it.
+
+    Args:
+        key (str): Cache key of the counter
+
+    Returns:
+        None
+    """
+    try:
+        cache.set(key, uuid.uuid4().hex, timeout=0)
+    except Exception as e:
+        current_app.logger.warning('Cache write of %s failed: %s', key, e)
+
+
+def fetch(key):
+    """
+    Read a cached response body.
+
+    Args:
+        key (str): Cache key, or None when no key could be built
+
+    Returns:
+        bytes: Cached body, or None on a miss or a cache failure
+    """
+    if key is None:
+        return None
+
+    try:
+        return cache.get(key)
+    except Exception as e:
+        current_app.logger.warning('Cache read of %s failed: %s', key, e)
+        return None
+
+
+def store(key, body, timeout=None):
+    """
+    Cache a response body.
+
+    Args:
+        key (str): Cache key, or None to skip caching
+        body (bytes): Encoded response body
+        timeout (int, optional): Seconds to keep the entry (default: cache default)
+
+    Returns:
+        None
+    """
+    if key is None:
+        return
+
+    try:
+        cache.set(key, body, timeout=timeout)
+    except Exception as e:
+        current_app.logger.warning('Cache write of %s failed: %s', key, e)
+
+
+def encode(payload):
+    """
+    Encode a response payload with the app's JSON provider.
+
+    Args:
+        payload (dict): Response data
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    return current_app.json.dumps(payload).encode('utf-8')
+
+
+def json_response(body, status=200):
+    """
+    Build a response from an already-encoded JSON body.
+
+    Args:
+        body (bytes): Encoded JSON
+        status (int): HTTP status code
+
+    Returns:
+        Response: JSON response
+    """
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+def prime_user(user, timeout=30):
+    """
+    Cache a user's profile responses ahead of the first request for them.
+
+    Best-effort: a failing cache backend is logged and otherwise ignored.
+
+    Args:
+        user (User): User whose ``/me`` and by-username responses to cache
+        timeout (int): Seconds to keep the entries
+
+    Returns:
+        None
+    """
+    body = encode({'user': user.to_dict()})
+    store(me_key(user.id), body, timeout=timeout)
+    store(user_key(user.username), body, timeout=timeout)
+
+
+def invalidate_user_list():
+    """
+    Drop every cached page of the user list.
+
+    Returns:
+        None
+    """
+    _bump_generation(LIST_GENERATION_KEY)
+
+
+def invalidate_user(user_id, username):
+    """
+    Drop every cached response that contains a user.
+
+    Args:
+        user_id (int): User ID
+        username (str): Username
+
+    Returns:
+        None
+    """
+    invalidate_users([(user_id, username)])
+
+
+def invalidate_users(users):
+    """
+    Drop every cached response that contains any of the given users.
+
+    Args:
+        users (iterable): ``(user_id, username)`` pairs
+
+    Returns:
+        None
+    """
+    # Bumping generations rather than deleting keys also retires entries
+    # that requests still reading the old row have yet to store
+    for user_id, username in users:
+        _bump_generation(_USER_GENERATION_KEY.format(username))
+        _bump_generation(_ME_GENERATION_KEY.format(user_id))
+    invalidate_user_list()
@@ -4,13 +4,49 @@ User Service Layer
 This module contains business logic for user operations.
 """
 
-from users_service.app import db
+from users_service.extensions import db
 from users_service.domain.models import User
+from users_service.application import caching
 from users_service.application.validators import (
     validate_username, validate_password, validate_email_address,
-    validate_role, validate_name, ValidationError
+    validate_role, validate_name, validate_user_ids, is_valid_username,
+    ValidationError, USERNAME_FORMAT_ERROR
 )
+from sqlalchemy import delete
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+
+
+def _duplicate_user_error(error, username, email):
+    """
+    Build the user-facing error for a unique constraint violation on users.
+
+    PostgreSQL reports the violated constraint by name; other drivers such as
+    SQLite only name the column in the error message.
+
+    Args:
+        error (IntegrityError): Error raised by the failed INSERT
+        username (str): Username that was being inserted
+        email (str): Email that was being inserted
+
+    Returns:
+        ValueError: Error describing which field is already taken
+    """
+    diag = getattr(error.orig, 'diag', None)
+    detail = getattr(diag, 'constraint_name', None) or str(error.orig)
+
+    if 'username' in detail:
+        return ValueError(f"Username '{username}' already exists")
+    if 'email' in detail:
+        return ValueError(f"Email '{email}' already registered")
+    return ValueError("Failed to create user: User already exists")
+
+
+# Columns returned by the user list, in User.to_dict() order
+_PUBLIC_COLUMNS = (
+    User.id, User.name, User.username, User.email,
+    User.role, User.created_at, User.updated_at
+)
 
 
 class UserService:
@@ -42,13 +78,6 @@ class UserService:
         email = validate_email_address(email)
         role = validate_role(role)
 
-        # Check if user already exists
-        if User.query.filter_by(username=username).first():
-            raise ValueError(f"Username '{username}' already exists")
-
-        if User.query.filter_by(email=email).first():
-            raise ValueError(f"Email '{email}' already registered")
-
         # Create user
         user = User(
             name=name,
@@ -58,13 +87,16 @@ class UserService:
         )
         user.set_password(password)
 
+        # The unique constraints on username and email reject duplicates
         try:
             db.session.add(user)
             db.session.commit()
-            return user
         except IntegrityError as e:
             db.session.rollback()
-            raise ValueError("Failed to create user: User already exists")
+            raise _duplicate_user_error(e, username, email)
+
+        caching.invalidate_user_list()
+        return user
 
     @staticmethod
     def authenticate_user(username, password):
@@ -81,7 +113,8 @@ class UserService:
         Raises:
             ValidationError: If input validation fails
         """
-        username = validate_username(username)
+        if not is_valid_username(username):
+            raise ValidationError(USERNAME_FORMAT_ERROR)
 
         user = User.query.filter_by(username=username).first()
 
@@ -101,7 +134,7 @@ class UserService:
         Returns:
             User: User object or None
         """
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
 
     @staticmethod
     def get_user_by_username(username):
@@ -117,18 +150,78 @@ class UserService:
         Raises:
             ValidationError: If input validation fails
         """
-        username = validate_username(username)
+        if not is_valid_username(username):
+            raise ValidationError(USERNAME_FORMAT_ERROR)
+
         return User.query.filter_by(username=username).first()
 
     @staticmethod
-    def get_all_users():
+    def get_all_users(limit=100, offset=0):
         """
-        Get all users.
+        Get one page of users, ordered by ID.
+
+        The password hash is not loaded.
+
+        Args:
+            limit (int): Maximum number of users to return (default: 100)
+            offset (int): Number of users to skip (default: 0)
 
         Returns:
-            list: List of all users
+            list: List of users in the requested page
+        """
+        return (
+            User.query
+            .options(load_only(*_PUBLIC_COLUMNS))
+            .order_by(User.id)
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+
+    @staticmethod
+    def get_all_users_dicts(limit=100, offset=0):
+        """
+        Get one page of users as plain dictionaries, ordered by ID.
+
+        Selects the public columns directly instead of building ``User``
+        objects; each dictionary matches ``User.to_dict()``.
+
+        Args:
+            limit (int): Maximum number of users to return (default: 100)
+            offset (int): Number of users to skip (default: 0)
+
+        Returns:
+            list: List of user dictionaries in the requested page
+        """
+        rows = db.session.execute(
+            db.select(*_PUBLIC_COLUMNS)
+            .order_by(User.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        return [row._asdict() for row in rows]
+
+    @staticmethod
+    def iter_user_dicts(batch_size=500):
         """
-        return User.query.all()
+        Iterate over every user as a plain dictionary, ordered by ID.
+
+        Rows are fetched from the database ``batch_size`` at a time, so the
+        full table is never held in memory.
+
+        Args:
+            batch_size (int): Rows fetched per round trip (default: 500)
+
+        Yields:
+            dict: User data matching ``User.to_dict()``
+        """
+        rows = db.session.execute(
+            db.select(*_PUBLIC_COLUMNS)
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            yield row._asdict()
 
     @staticmethod
     def update_user(user_id, **kwargs):
@@ -146,7 +239,7 @@ class UserService:
             ValidationError: If input validation fails
             ValueError: If user not found or update fails
         """
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             raise ValueError(f"User with ID {user_id} not found")
 
@@ -157,8 +250,10 @@ class UserService:
         if 'email' in kwargs:
             new_email = validate_email_address(kwargs['email'])
             # Check if email is already taken by another user
-            existing = User.query.filter_by(email=new_email).first()
-            if existing and existing.id != user_id:
+            taken = User.query.with_entities(User.id).filter(
+                User.email == new_email, User.id != user.id
+            ).first()
+            if taken:
                 raise ValueError(f"Email '{new_email}' already registered")
             user.email = new_email
 
@@ -171,11 +266,13 @@ class UserService:
 
         try:
             db.session.commit()
-            return user
         except IntegrityError as e:
             db.session.rollback()
             raise ValueError("Failed to update user")
 
+        caching.invalidate_user(user.id, user.username)
+        return user
+
     @staticmethod
     def delete_user(user_id):
         """
@@ -190,14 +287,51 @@ class UserService:
         Raises:
             ValueError: If user not found
         """
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             raise ValueError(f"User with ID {user_id} not found")
 
+        username = user.username
+
         try:
             db.session.delete(user)
             db.session.commit()
-            return True
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Failed to delete user: {str(e)}")
+
+        caching.invalidate_user(user_id, username)
+        return True
+
+    @staticmethod
+    def delete_users(user_ids):
+        """
+        Delete several user accounts with a single statement.
+
+        IDs that don't exist are ignored.
+
+        Args:
+            user_ids (list): User IDs to delete
+
+        Returns:
+            list: IDs of the users that were deleted
+
+        Raises:
+            ValidationError: If the ID list is invalid
+            ValueError: If the deletion fails
+        """
+        user_ids = validate_user_ids(user_ids)
+
+        try:
+            deleted = db.session.execute(
+                delete(User)
+                .where(User.id.in_(user_ids))
+                .returning(User.id, User.username)
+            ).all()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"Failed to delete users: {str(e)}")
+
+        caching.invalidate_users(deleted)
+        return [row.id for row in deleted]
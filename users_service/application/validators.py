@@ -10,14 +10,31 @@ import bleach
 from email_validator import validate_email, EmailNotValidError
 
 
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]{3,50}\Z')
+_NAME_RE = re.compile(r"^[a-zA-Z\s\-']{2,100}$")
+_ROLE_NAMES = ('admin', 'regular_user', 'facility_manager', 'moderator', 'auditor', 'service_account')
+_VALID_ROLES = frozenset(_ROLE_NAMES)
+_VALID_ROLES_STR = ', '.join(_ROLE_NAMES)  # For error messages, in declaration order
+_TAG_RE = re.compile(r'<[^>]*>')
+
+MAX_PAGE_SIZE = 500
+MAX_BULK_IDS = 1000
+USERNAME_FORMAT_ERROR = (
+    "Username must be 3-50 characters and contain only letters, numbers, and underscores"
+)
+
+
 class ValidationError(Exception):
     """Custom exception for validation errors."""
     pass
 
 
-def sanitize_string(value, max_length=None):
+def sanitize_strict(value, max_length=None):
     """
-    Sanitize string input to prevent XSS attacks.
+    Check and trim a plain-text input that must not contain markup.
+
+    Used for fields whose format validation already rejects ``<`` and ``>``,
+    so no HTML stripping is needed.
 
     Args:
         value (str): Input string to sanitize
@@ -32,11 +49,8 @@ def sanitize_string(value, max_length=None):
     if not isinstance(value, str):
         raise ValidationError("Input must be a string")
 
-    # Remove any HTML tags
-    sanitized = bleach.clean(value, tags=[], strip=True)
-
     # Strip whitespace
-    sanitized = sanitized.strip()
+    sanitized = value.strip()
 
     if not sanitized:
         raise ValidationError("Input cannot be empty")
@@ -47,6 +61,34 @@ def sanitize_string(value, max_length=None):
     return sanitized
 
 
+def sanitize_html(value, max_length=None, strict_html=False):
+    """
+    Sanitize free-text input to prevent XSS attacks.
+
+    Args:
+        value (str): Input string to sanitize
+        max_length (int, optional): Maximum allowed length
+        strict_html (bool): Strip tags with bleach's full HTML parser instead
+            of the lightweight tag pattern
+
+    Returns:
+        str: Sanitized string
+
+    Raises:
+        ValidationError: If input is invalid
+    """
+    if not isinstance(value, str):
+        raise ValidationError("Input must be a string")
+
+    # Remove any HTML tags
+    if strict_html:
+        value = bleach.clean(value, tags=[], strip=True)
+    else:
+        value = _TAG_RE.sub('', value)
+
+    return sanitize_strict(value, max_length=max_length)
+
+
 def validate_username(username):
     """
     Validate and sanitize username.
@@ -60,17 +102,31 @@ def validate_username(username):
     Raises:
         ValidationError: If username is invalid
     """
-    username = sanitize_string(username, max_length=50)
+    username = sanitize_strict(username, max_length=50)
 
     # Username must be alphanumeric with underscores, 3-50 characters
-    if not re.match(r'^[a-zA-Z0-9_]{3,50}$', username):
-        raise ValidationError(
-            "Username must be 3-50 characters and contain only letters, numbers, and underscores"
-        )
+    if not _USERNAME_RE.match(username):
+        raise ValidationError(USERNAME_FORMAT_ERROR)
 
     return username
 
 
+def is_valid_username(username):
+    """
+    Check a username without sanitizing it.
+
+    For lookups, where the value is only compared against stored usernames.
+    The pattern admits no markup characters, so nothing needs stripping.
+
+    Args:
+        username: Value to check
+
+    Returns:
+        bool: True if ``username`` is a well-formed username
+    """
+    return isinstance(username, str) and _USERNAME_RE.match(username) is not None
+
+
 def validate_password(password):
     """
     Validate password strength.
@@ -93,14 +149,27 @@ def validate_password(password):
     if len(password) > 128:
         raise ValidationError("Password exceeds maximum length of 128 characters")
 
-    # Check for at least one uppercase, one lowercase, and one digit
-    if not re.search(r'[A-Z]', password):
+    # Check for at least one uppercase, one lowercase, and one digit in one pass
+    has_upper = has_lower = has_digit = False
+    for char in password:
+        if 'A' <= char <= 'Z':
+            has_upper = True
+        elif 'a' <= char <= 'z':
+            has_lower = True
+        elif '0' <= char <= '9':
+            has_digit = True
+        else:
+            continue
+        if has_upper and has_lower and has_digit:
+            break
+
+    if not has_upper:
         raise ValidationError("Password must contain at least one uppercase letter")
 
-    if not re.search(r'[a-z]', password):
+    if not has_lower:
         raise ValidationError("Password must contain at least one lowercase letter")
 
-    if not re.search(r'[0-9]', password):
+    if not has_digit:
         raise ValidationError("Password must contain at least one digit")
 
     return password
@@ -120,7 +189,7 @@ def validate_email_address(email):
         ValidationError: If email is invalid
     """
     try:
-        email = sanitize_string(email, max_length=120)
+        email = sanitize_strict(email, max_length=120)
         validated = validate_email(email, check_deliverability=False)
         return validated.normalized
     except EmailNotValidError as e:
@@ -140,13 +209,11 @@ def validate_role(role):
     Raises:
         ValidationError: If role is invalid
     """
-    valid_roles = ['admin', 'regular_user', 'facility_manager', 'moderator', 'auditor', 'service_account']
+    role = sanitize_strict(role, max_length=20)
 
-    role = sanitize_string(role, max_length=20)
-
-    if role not in valid_roles:
+    if role not in _VALID_ROLES:
         raise ValidationError(
-            f"Invalid role. Must be one of: {', '.join(valid_roles)}"
+            f"Invalid role. Must be one of: {_VALID_ROLES_STR}"
         )
 
     return role
@@ -165,12 +232,67 @@ def validate_name(name):
     Raises:
         ValidationError: If name is invalid
     """
-    name = sanitize_string(name, max_length=100)
+    name = sanitize_html(name, max_length=100)
 
     # Name should contain only letters, spaces, hyphens, and apostrophes
-    if not re.match(r"^[a-zA-Z\s\-']{2,100}$", name):
+    if not _NAME_RE.match(name):
         raise ValidationError(
             "Name must be 2-100 characters and contain only letters, spaces, hyphens, and apostrophes"
         )
 
     return name
+
+
+def validate_pagination(limit, offset):
+    """
+    Validate list pagination parameters.
+
+    Args:
+        limit: Requested page size (string or int)
+        offset: Number of rows to skip (string or int)
+
+    Returns:
+        tuple: ``(limit, offset)`` as integers
+
+    Raises:
+        ValidationError: If either value is not a valid integer or out of range
+    """
+    try:
+        limit = int(limit)
+        offset = int(offset)
+    except (TypeError, ValueError):
+        raise ValidationError("Limit and offset must be integers")
+
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValidationError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    if offset < 0:
+        raise ValidationError("Offset cannot be negative")
+
+    return limit, offset
+
+
+def validate_user_ids(user_ids):
+    """
+    Validate a list of user IDs for a bulk operation.
+
+    Args:
+        user_ids: Value to validate; must be a non-empty list of integers
+
+    Returns:
+        list: Unique user IDs, in the order given
+
+    Raises:
+        ValidationError: If the value is not a valid list of IDs
+    """
+    if not isinstance(user_ids, list) or not user_ids:
+        raise ValidationError("user_ids must be a non-empty list")
+
+    if len(user_ids) > MAX_BULK_IDS:
+        raise ValidationError(f"user_ids cannot contain more than {MAX_BULK_IDS} IDs")
+
+    # bool is an int subclass; reject it explicitly
+    if any(type(user_id) is not int for user_id in user_ids):
+        raise ValidationError("user_ids must contain only integers")
+
+    return list(dict.fromkeys(user_ids))
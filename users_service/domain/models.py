@@ -4,8 +4,9 @@ User Domain Models
 This module defines the User entity and related domain models.
 """
 
-from users_service.app import db
-from datetime import datetime
+from flask import current_app
+from users_service.extensions import db
+from sqlalchemy.sql import func
 import bcrypt
 
 
@@ -25,6 +26,8 @@ class User(db.Model):
     """
 
     __tablename__ = 'users'
+    # Read the database-generated timestamps back with RETURNING on flush
+    __mapper_args__ = {'eager_defaults': True}
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -32,20 +35,32 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     role = db.Column(db.String(20), nullable=False, default='regular_user')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # default= puts now() in the INSERT itself, so tables created before the
+    # server_default was added (create_all never alters them) still get a value
+    created_at = db.Column(
+        db.DateTime, default=func.now(), server_default=func.now(), nullable=False
+    )
+    updated_at = db.Column(
+        db.DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(),
+        nullable=False
+    )
 
     def set_password(self, password):
         """
         Hash and set the user password.
 
+        The bcrypt work factor comes from the ``BCRYPT_ROUNDS`` setting.
+
         Args:
             password (str): Plain text password
 
         Returns:
             None
         """
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        rounds = current_app.config.get('BCRYPT_ROUNDS', 12)
+        self.password_hash = bcrypt.hashpw(
+            password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)
+        ).decode('utf-8')
 
     def check_password(self, password):
         """
@@ -63,22 +78,24 @@ class User(db.Model):
         """
         Convert user object to dictionary.
 
+        Timestamps are returned as datetimes; the app's JSON provider
+        renders them in ISO 8601.
+
         Args:
             include_sensitive (bool): Whether to include sensitive information
 
         Returns:
             dict: User data as dictionary
         """
-        data = {
+        return {
             'id': self.id,
             'name': self.name,
             'username': self.username,
             'email': self.email,
             'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
-        return data
 
     def __repr__(self):
         """String representation of User."""
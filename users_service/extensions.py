@@ -0,0 +1,89 @@
+"""
+Users Service Extensions
+
+This module holds the Flask extension instances shared by the Users Service.
+They live apart from the application factory so the models and routes can
+import them without importing ``users_service.app``.
+"""
+
+import hashlib
+import threading
+import time
+
+from cachetools import TTLCache
+from flask import current_app
+from flask_caching import Cache
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager
+
+
+# app.extensions key holding each application's verified-token cache
+DECODED_TOKENS_EXTENSION = 'jwt_decoded_tokens'
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWT manager that remembers the claims of tokens it has already verified.
+
+    A client sends the same access token on every request, so after the first
+    signature check the decoded claims are served from an in-process TTL
+    cache keyed by a digest of the token. Each application gets its own cache
+    in ``app.extensions``, so a token verified by one app is never accepted by
+    another with a different secret, audience or issuer. A cached token is
+    only reused while its ``exp`` claim is still in the future; anything else
+    goes through the full decode.
+
+    Args:
+        app (Flask, optional): Application to initialize
+        maxsize (int): Maximum number of cached tokens per application
+        ttl (int): Seconds a decoded token is kept
+    """
+
+    def __init__(self, app=None, maxsize=10000, ttl=3600, **kwargs):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._decoded_tokens_lock = threading.Lock()
+        super().__init__(app, **kwargs)
+
+    def init_app(self, app, add_context_processor=False):
+        super().init_app(app, add_context_processor)
+        app.extensions[DECODED_TOKENS_EXTENSION] = TTLCache(maxsize=self._maxsize, ttl=self._ttl)
+
+    @staticmethod
+    def token_key(encoded_token):
+        """
+        Build the cache key for an encoded token.
+
+        Args:
+            encoded_token (str): Encoded JWT as sent by the client
+
+        Returns:
+            bytes: 16-byte digest of the token
+        """
+        return hashlib.blake2b(encoded_token.encode('utf-8'), digest_size=16).digest()
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # CSRF checks and expired-token decodes are rare; don't cache them
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        decoded_tokens = current_app.extensions[DECODED_TOKENS_EXTENSION]
+        key = self.token_key(encoded_token)
+
+        with self._decoded_tokens_lock:
+            claims = decoded_tokens.get(key)
+
+        if claims is not None and time.time() < claims.get('exp', float('inf')):
+            return dict(claims)
+
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        with self._decoded_tokens_lock:
+            decoded_tokens[key] = claims
+
+        return dict(claims)
+
+
+db = SQLAlchemy()
+jwt = CachingJWTManager()
+cache = Cache()
@@ -0,0 +1,27 @@
+"""
+Users Service Database Initialization
+
+This module creates the Users Service database schema. Run it once per
+deployment before starting the application workers:
+
+    python -m users_service.init_db
+"""
+
+from users_service.app import create_app, db
+
+
+def init_db():
+    """
+    Create all Users Service tables that do not exist yet.
+
+    Returns:
+        None
+    """
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+
+
+if __name__ == '__main__':
+    init_db()
@@ -4,15 +4,107 @@ Users Service API Routes
 This module defines the REST API endpoints for user management.
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+import orjson
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
 from users_service.application.services import UserService
-from users_service.application.validators import ValidationError
+from users_service.application.validators import ValidationError, validate_pagination
 from users_service.application.auth import role_required, get_current_user
+from users_service.application import caching
 from users_service.domain.models import User
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Roles allowed to view any user's profile
+_READ_ALL_ROLES = frozenset({'admin', 'auditor'})
+
+
+def _static_json(payload, status):
+    """
+    Encode a fixed JSON response once, at import time.
+
+    Args:
+        payload (dict): Response data
+        status (int): HTTP status code
+
+    Returns:
+        tuple: ``(body, status, headers)`` that a view can return as is
+    """
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS) + b'\n'
+    return body, status, _JSON_HEADERS
+
+
+# Responses whose content never changes
+_HEALTHY = _static_json({'status': 'healthy', 'service': 'users'}, 200)
+_ERR_NO_DATA = _static_json({'error': 'No data provided'}, 400)
+_ERR_INVALID_JSON = _static_json({'error': 'Request body must be a JSON object'}, 400)
+_ERR_MISSING_FIELDS = _static_json({
+    'error': 'Missing required fields',
+    'required': ['name', 'username', 'password', 'email']
+}, 400)
+_ERR_MISSING_CREDENTIALS = _static_json({
+    'error': 'Missing credentials',
+    'required': ['username', 'password']
+}, 400)
+_ERR_INVALID_CREDENTIALS = _static_json({'error': 'Invalid username or password'}, 401)
+_ERR_VIEW_OWN_PROFILE = _static_json({'error': 'You can only view your own profile'}, 403)
+_ERR_UPDATE_OWN_PROFILE = _static_json({'error': 'You can only update your own profile'}, 403)
+_ERR_ADMIN_ONLY_ROLE_CHANGE = _static_json({'error': 'Only admins can change user roles'}, 403)
+_ERR_USER_NOT_FOUND = _static_json({'error': 'User not found'}, 404)
+
+# Byte templates for responses that embed one request value
+_USER_NOT_FOUND_PREFIX = b'{"error":"User \''
+_USER_NOT_FOUND_SUFFIX = b'\' not found"}\n'
+_USER_DELETED_PREFIX = b'{"message":"User with ID '
+_USER_DELETED_SUFFIX = b' deleted successfully"}\n'
+
+
+def _parse_json_body():
+    """
+    Parse the request body as a JSON object.
+
+    The raw body is decoded with orjson directly, without Flask's
+    Content-Type checks, and is not kept after parsing.
+
+    Returns:
+        tuple: ``(data, None)`` on success, or ``(None, error_response)``
+            when the body is empty, not valid JSON, or not a JSON object
+    """
+    body = request.get_data(cache=False)
+
+    if not body:
+        return None, _ERR_NO_DATA
+
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None, _ERR_INVALID_JSON
+
+    if not isinstance(data, dict):
+        return None, _ERR_INVALID_JSON
+
+    if not data:
+        return None, _ERR_NO_DATA
+
+    return data, None
+
+
+def _ndjson_lines(items):
+    """
+    Encode items as newline-delimited JSON.
+
+    Args:
+        items (iterable): JSON-serializable objects
+
+    Yields:
+        bytes: One encoded object per line
+    """
+    dumps = current_app.json.dumps
+    for item in items:
+        yield dumps(item).encode('utf-8') + b'\n'
+
 
 @users_bp.route('/health', methods=['GET'])
 def health_check():
@@ -22,7 +114,7 @@ def health_check():
     Returns:
         JSON response with service status
     """
-    return jsonify({'status': 'healthy', 'service': 'users'}), 200
+    return _HEALTHY
 
 
 @users_bp.route('/register', methods=['POST'])
@@ -46,10 +138,10 @@ def register():
         500: Internal server error
     """
     try:
-        data = request.get_json()
+        data, error = _parse_json_body()
 
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        if error:
+            return error
 
         # Extract required fields
         name = data.get('name')
@@ -60,10 +152,7 @@ def register():
 
         # Validate required fields
         if not all([name, username, password, email]):
-            return jsonify({
-                'error': 'Missing required fields',
-                'required': ['name', 'username', 'password', 'email']
-            }), 400
+            return _ERR_MISSING_FIELDS
 
         # Create user
         user = UserService.create_user(name, username, password, email, role)
@@ -100,28 +189,31 @@ def login():
         500: Internal server error
     """
     try:
-        data = request.get_json()
+        data, error = _parse_json_body()
 
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        if error:
+            return error
 
         username = data.get('username')
         password = data.get('password')
 
         if not username or not password:
-            return jsonify({
-                'error': 'Missing credentials',
-                'required': ['username', 'password']
-            }), 400
+            return _ERR_MISSING_CREDENTIALS
 
         # Authenticate user
         user = UserService.authenticate_user(username, password)
 
         if not user:
-            return jsonify({'error': 'Invalid username or password'}), 401
+            return _ERR_INVALID_CREDENTIALS
 
         # Create access token
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(
+            identity=user.id,
+            additional_claims={'role': user.role}
+        )
+
+        # Clients fetch their profile right after logging in
+        caching.prime_user(user)
 
         return jsonify({
             'message': 'Login successful',
@@ -140,26 +232,57 @@ def login():
 @role_required('admin', 'auditor')
 def get_all_users():
     """
-    Get all users (Admin and Auditor only).
+    Get a page of users (Admin and Auditor only).
 
     Headers:
         - Authorization: Bearer <access_token>
 
+    Query Parameters:
+        - limit (int, optional): Page size, 1-500 (default: 100)
+        - offset (int, optional): Number of users to skip (default: 0)
+        - stream (str, optional): ``1`` to stream every user as NDJSON, one
+          object per line, instead of returning a page; limit and offset
+          are ignored
+
     Returns:
-        JSON response with list of all users
+        JSON response with the requested page of users, or an
+        ``application/x-ndjson`` stream of all users
 
     Status Codes:
         200: Success
+        400: Invalid pagination parameters
         403: Insufficient permissions
         500: Internal server error
     """
     try:
-        users = UserService.get_all_users()
-        return jsonify({
-            'users': [user.to_dict() for user in users],
-            'count': len(users)
-        }), 200
+        if request.args.get('stream') == '1':
+            return Response(
+                stream_with_context(_ndjson_lines(UserService.iter_user_dicts())),
+                mimetype='application/x-ndjson'
+            )
+
+        limit, offset = validate_pagination(
+            request.args.get('limit', 100),
+            request.args.get('offset', 0)
+        )
+
+        key = caching.list_key(limit, offset)
+        body = caching.fetch(key)
+
+        if body is None:
+            users = UserService.get_all_users_dicts(limit=limit, offset=offset)
+            body = caching.encode({
+                'users': users,
+                'count': len(users),
+                'limit': limit,
+                'offset': offset
+            })
+            caching.store(key, body)
+
+        return caching.json_response(body)
 
+    except ValidationError as e:
+        return jsonify({'error': f'Validation error: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
@@ -188,20 +311,35 @@ def get_user(username):
         500: Internal server error
     """
     try:
-        current_user = get_current_user()
+        # Check permissions: admin can view anyone, users can view themselves.
+        # Admins and auditors are recognised from the token's role claim, so
+        # their own row is never loaded.
+        if get_jwt().get('role') not in _READ_ALL_ROLES:
+            current_user = get_current_user()
 
-        # Check permissions: admin can view anyone, users can view themselves
-        if current_user.role not in ['admin', 'auditor'] and current_user.username != username:
-            return jsonify({
-                'error': 'You can only view your own profile'
-            }), 403
+            if current_user.username == username:
+                # Viewing their own profile: the row is already loaded
+                return jsonify({'user': current_user.to_dict()}), 200
 
-        user = UserService.get_user_by_username(username)
+            if current_user.role not in _READ_ALL_ROLES:
+                return _ERR_VIEW_OWN_PROFILE
 
-        if not user:
-            return jsonify({'error': f"User '{username}' not found"}), 404
+        key = caching.user_key(username)
+        body = caching.fetch(key)
+
+        if body is None:
+            user = UserService.get_user_by_username(username)
+
+            if not user:
+                # orjson escapes the username; drop its surrounding quotes
+                escaped = orjson.dumps(username)[1:-1]
+                body = _USER_NOT_FOUND_PREFIX + escaped + _USER_NOT_FOUND_SUFFIX
+                return body, 404, _JSON_HEADERS
 
-        return jsonify({'user': user.to_dict()}), 200
+            body = caching.encode({'user': user.to_dict()})
+            caching.store(key, body)
+
+        return caching.json_response(body)
 
     except ValidationError as e:
         return jsonify({'error': f'Validation error: {str(e)}'}), 400
@@ -244,22 +382,19 @@ def update_user(user_id):
 
         # Check permissions
         if current_user.role != 'admin' and current_user.id != user_id:
-            return jsonify({
-                'error': 'You can only update your own profile'
-            }), 403
+            return _ERR_UPDATE_OWN_PROFILE
 
-        data = request.get_json()
+        data, error = _parse_json_body()
 
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        if error:
+            return error
 
         # Only admin can change roles
         if 'role' in data and current_user.role != 'admin':
-            return jsonify({
-                'error': 'Only admins can change user roles'
-            }), 403
+            return _ERR_ADMIN_ONLY_ROLE_CHANGE
 
-        # Update user
+        # Update user. When users update themselves, the row loaded above is
+        # reused from the session's identity map without another SELECT.
         user = UserService.update_user(user_id, **data)
 
         return jsonify({
@@ -300,12 +435,55 @@ def delete_user(user_id):
     try:
         UserService.delete_user(user_id)
 
+        body = _USER_DELETED_PREFIX + str(user_id).encode('ascii') + _USER_DELETED_SUFFIX
+        return body, 200, _JSON_HEADERS
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404 if 'not found' in str(e) else 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+
+@users_bp.route('/bulk', methods=['DELETE'])
+@jwt_required()
+@role_required('admin')
+def delete_users():
+    """
+    Delete several user accounts in one request (Admin only).
+
+    Headers:
+        - Authorization: Bearer <access_token>
+
+    Request Body:
+        - user_ids (list): IDs of the users to delete (at most 1000)
+
+    Returns:
+        JSON response listing the IDs that were deleted; unknown IDs are skipped
+
+    Status Codes:
+        200: Deletion successful
+        400: Validation error
+        403: Insufficient permissions
+        500: Internal server error
+    """
+    try:
+        data, error = _parse_json_body()
+
+        if error:
+            return error
+
+        deleted = UserService.delete_users(data.get('user_ids'))
+
         return jsonify({
-            'message': f'User with ID {user_id} deleted successfully'
+            'message': f'Deleted {len(deleted)} users',
+            'deleted': deleted,
+            'count': len(deleted)
         }), 200
 
+    except ValidationError as e:
+        return jsonify({'error': f'Validation error: {str(e)}'}), 400
     except ValueError as e:
-        return jsonify({'error': str(e)}), 404 if 'not found' in str(e) else 400
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
@@ -328,12 +506,19 @@ def get_current_user_profile():
         500: Internal server error
     """
     try:
-        current_user = get_current_user()
+        key = caching.me_key(get_jwt_identity())
+        body = caching.fetch(key)
+
+        if body is None:
+            current_user = get_current_user()
+
+            if not current_user:
+                return _ERR_USER_NOT_FOUND
 
-        if not current_user:
-            return jsonify({'error': 'User not found'}), 404
+            body = caching.encode({'user': current_user.to_dict()})
+            caching.store(key, body)
 
-        return jsonify({'user': current_user.to_dict()}), 200
+        return caching.json_response(body)
 
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500